@@ -191,12 +191,22 @@ void modify_mpc_cell(
   // Data structures used for insertion of master contributions
   std::array<std::int32_t, 1> row;
   std::array<std::int32_t, 1> col;
-  std::array<T, 1> A0;
   auto Arow = scratch_memory.subspan(2 * ndim0 * ndim1, ndim0);
-  auto Acol = scratch_memory.subspan(2 * ndim0 * ndim1 + ndim0, ndim1);
+
+  // Each master applied to rows gets a contribution in the columns of the
+  // cell dofs and in the columns of the masters applied to columns. Insert
+  // them as a single row to reduce the number of calls to mat_set
+  const std::size_t num_master_cols = ndim1 + num_flattened_masters[1];
+  std::vector<std::int32_t> master_cols(num_master_cols);
+  std::vector<T> master_values(num_master_cols);
+  for (std::uint32_t j = 0; j < num_dofs[1]; ++j)
+    for (int k = 0; k < bs[1]; ++k)
+      master_cols[j * bs[1] + k] = dofs[1][j] * bs[1] + k;
+  std::copy(flattened_masters[1].cbegin(), flattened_masters[1].cend(),
+            std::next(master_cols.begin(), ndim1));
+
   // Loop over all masters for the MPC applied to rows.
   // Insert contributions in columns
-  std::vector<std::int32_t> unrolled_dofs(ndim1);
   for (std::size_t i = 0; i < num_flattened_masters[0]; ++i)
   {
     // Use the standard transpose for type double, Hermitian transpose
@@ -208,32 +218,26 @@ void modify_mpc_cell(
     else
       coeff_i = std::conj(flattened_coeffs[0][i]);
 
-    // Unroll dof blocks and add column contribution
-    for (std::uint32_t j = 0; j < num_dofs[1]; ++j)
-      for (int k = 0; k < bs[1]; ++k)
-      {
-        Acol[j * bs[1] + k]
-            = coeff_i * Ae_stripped(flattened_slaves[0][i], j * bs[1] + k);
-        unrolled_dofs[j * bs[1] + k] = dofs[1][j] * bs[1] + k;
-      }
-
-    // Insert modified entries
-    row[0] = flattened_masters[0][i];
-    mat_set(row, unrolled_dofs, Acol);
+    // Add column contribution of the cell dofs
+    for (int j = 0; j < ndim1; ++j)
+      master_values[j] = coeff_i * Ae_stripped(flattened_slaves[0][i], j);
 
-    // Loop through other masters on the same cell and add in contribution
+    // Add contribution of other masters on the same cell
     for (std::size_t j = 0; j < num_flattened_masters[1]; ++j)
     {
-      col[0] = flattened_masters[1][j];
-      A0[0] = coeff_i * flattened_coeffs[1][j]
-                * Ae_original(flattened_slaves[0][i], flattened_slaves[1][j]);
-      mat_set(row, col, A0);
+      master_values[ndim1 + j]
+          = coeff_i * flattened_coeffs[1][j]
+            * Ae_original(flattened_slaves[0][i], flattened_slaves[1][j]);
     }
+
+    // Insert modified entries
+    row[0] = flattened_masters[0][i];
+    mat_set(row, master_cols, master_values);
   }
 
   // Loop over all masters for the MPC applied to columns.
   // Insert contributions in rows
-  unrolled_dofs.resize(ndim0);
+  std::vector<std::int32_t> unrolled_dofs(ndim0);
   for (std::size_t i = 0; i < num_flattened_masters[1]; ++i)
   {
 
@@ -402,10 +402,6 @@ dolfinx::la::SparsityPattern dolfinx_mpc::create_sparsity_pattern(
     const auto& V = mpc->function_space();
     const auto& V_off_axis = mpc_off_axis->function_space();
 
-    // Data structures used for insert
-    std::array<std::int32_t, 1> master_block;
-    std::array<std::int32_t, 1> other_master_block;
-
     // Map from cell index (local to mpc) to slave indices in the cell
     const std::shared_ptr<const dolfinx::graph::AdjacencyList<std::int32_t>>
         cell_to_slaves = mpc->cell_to_slaves();
@@ -435,19 +431,18 @@ dolfinx::la::SparsityPattern dolfinx_mpc::create_sparsity_pattern(
         }
       }
 
-      // Loop over all masters and insert all cell dofs for each master
-      for (std::size_t j = 0; j < flattened_masters.size(); ++j)
-      {
-        master_block[0] = flattened_masters[j];
-        pattern_inserter(pattern, std::span(master_block), cell_dofs);
-        // Add sparsity pattern for all master dofs of any slave on this cell
-        for (std::size_t k = j + 1; k < flattened_masters.size(); ++k)
-        {
-          other_master_block[0] = flattened_masters[k];
-          master_inserter(pattern, std::span(other_master_block),
-                          std::span(master_block));
-        }
-      }
+      // Slaves in the same cell (or in the same block) often share master
+      // blocks, so remove duplicates before inserting
+      std::sort(flattened_masters.begin(), flattened_masters.end());
+      flattened_masters.erase(
+          std::unique(flattened_masters.begin(), flattened_masters.end()),
+          flattened_masters.end());
+      std::span<const std::int32_t> master_blocks(flattened_masters);
+
+      // Insert all cell dofs for each master, and add sparsity pattern for all
+      // master dofs of any slave on this cell
+      pattern_inserter(pattern, master_blocks, cell_dofs);
+      master_inserter(pattern, master_blocks, master_blocks);
     }
   };
 
@@ -461,7 +456,10 @@ dolfinx::la::SparsityPattern dolfinx_mpc::create_sparsity_pattern(
       pattern.insert(dofs_m, dofs_s);
       pattern.insert(dofs_s, dofs_m);
     };
-    pattern_populator(pattern, mpc0, mpc1, square_inserter, square_inserter);
+    const auto master_inserter
+        = [](auto& pattern, const auto& dofs_m, const auto& dofs_s)
+    { pattern.insert(dofs_m, dofs_s); };
+    pattern_populator(pattern, mpc0, mpc1, square_inserter, master_inserter);
   }
   else
   {
@@ -9,7 +9,6 @@ from typing import List, Optional, Sequence
 
 import dolfinx.cpp as _cpp
 import dolfinx.fem as _fem
-import ufl
 from dolfinx.common import Timer
 from petsc4py import PETSc as _PETSc
 
@@ -26,7 +25,7 @@ def apply_lifting(b: _PETSc.Vec, form: List[_fem.FormMetaClass], bcs: List[List[
 
     Args:
         b: PETSc vector to assemble into
-        form: The linear form
+        form: The compiled bilinear forms
         bcs: List of Dirichlet boundary conditions
         constraint: The multi point constraint
         x0: List of vectors
@@ -42,13 +41,13 @@ def apply_lifting(b: _PETSc.Vec, form: List[_fem.FormMetaClass], bcs: List[List[
     t.stop()
 
 
-def assemble_vector(form: ufl.form.Form, constraint: MultiPointConstraint,
+def assemble_vector(form: _fem.FormMetaClass, constraint: MultiPointConstraint,
                     b: Optional[_PETSc.Vec] = None) -> _PETSc.Vec:
     """
-    Assemble a linear form into vector `b` with corresponding multi point constraint
+    Assemble a compiled DOLFINx linear form into vector `b` with corresponding multi point constraint
 
     Args:
-        form: The linear form
+        form: The compiled linear form
         constraint: The multi point constraint
         b: PETSc vector to assemble
 
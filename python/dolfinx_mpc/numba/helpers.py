@@ -33,12 +33,14 @@ def pack_slave_facet_info(facets: npt.NDArray[numpy.int32],
                           slave_cells: npt.NDArray[numpy.int32]) -> npt.NDArray[numpy.int32]:
     """
     Given an MPC and a set of facets (cell index, local_facet_index),
-    compress the set to those that only contain slave cells
+    compress the set to those that only contain slave cells.
+    The slave cells are assumed to be sorted (as returned by `extract_slave_cells`).
     """
     facet_info = numpy.zeros((len(facets), 2), dtype=numpy.int32)
     i = 0
     for facet in facets:
-        if sum(slave_cells == facet[0]) > 0:
+        pos = numpy.searchsorted(slave_cells, facet[0])
+        if pos < len(slave_cells) and slave_cells[pos] == facet[0]:
             facet_info[i, :] = [facet[0], facet[1]]
             i += 1
     return facet_info[:i, :]
@@ -5,6 +5,7 @@
 #
 # SPDX-License-Identifier:    MIT
 
+import json
 import typing
 
 import ufl
@@ -17,6 +18,27 @@ from .assemble_vector import apply_lifting, assemble_vector
 from .multipointconstraint import MultiPointConstraint
 
 
+def _compile_form(form: ufl.Form, form_compiler_options: dict, jit_options: dict) -> _fem.FormMetaClass:
+    """
+    Compile a UFL form, reusing the compiled form if the same form has already been compiled
+    with the same options. The compiled forms are stored in the cache of the UFL form, such
+    that they are released together with the UFL form.
+
+    Args:
+        form: The UFL form
+        form_compiler_options: Parameters used in FFCx compilation of this form
+        jit_options: Parameters used in CFFI JIT compilation of C code generated by FFCx
+    """
+    if not isinstance(form, ufl.Form):
+        return _fem.form(form, jit_options=jit_options, form_compiler_options=form_compiler_options)
+    compiled_forms = form._cache.setdefault("dolfinx_mpc_compiled_forms", {})
+    key = (json.dumps(form_compiler_options, sort_keys=True, default=str),
+           json.dumps(jit_options, sort_keys=True, default=str))
+    if key not in compiled_forms:
+        compiled_forms[key] = _fem.form(form, jit_options=jit_options, form_compiler_options=form_compiler_options)
+    return compiled_forms[key]
+
+
 class LinearProblem(_fem.petsc.LinearProblem):
     """
     Class for solving a linear variational problem with multi point constraints of the form
@@ -61,6 +83,8 @@ class LinearProblem(_fem.petsc.LinearProblem):
     _b: PETSc.Vec
     _solver: PETSc.KSP
     bcs: typing.List[_fem.DirichletBCMetaClass]
+    _solver_prefix: str
+    _petsc_keys: typing.List[str]
     __slots__ = tuple(__annotations__)
 
     def __init__(self, a: ufl.Form, L: ufl.Form, mpc: MultiPointConstraint,
@@ -69,11 +93,15 @@ class LinearProblem(_fem.petsc.LinearProblem):
                  petsc_options: typing.Optional[dict] = None,
                  form_compiler_options: typing.Optional[dict] = None, jit_options: typing.Optional[dict] = None):
 
+        # Give PETSc solver options a unique prefix
+        self._solver_prefix = "dolfinx_mpc_solve_{}".format(id(self))
+        self._petsc_keys = []
+
         # Compile forms
         form_compiler_options = {} if form_compiler_options is None else form_compiler_options
         jit_options = {} if jit_options is None else jit_options
-        self._a = _fem.form(a, jit_options=jit_options, form_compiler_options=form_compiler_options)
-        self._L = _fem.form(L, jit_options=jit_options, form_compiler_options=form_compiler_options)
+        self._a = _compile_form(a, form_compiler_options, jit_options)
+        self._L = _compile_form(L, form_compiler_options, jit_options)
 
         if not mpc.finalized:
             raise RuntimeError("The multi point constraint has to be finalized before calling initializer")
@@ -92,6 +120,9 @@ class LinearProblem(_fem.petsc.LinearProblem):
         pattern = create_sparsity_pattern(self._a, self._mpc)
         pattern.assemble()
         self._A = _cpp.la.petsc.create_matrix(self._mpc.function_space.mesh.comm, pattern)
+        # The sparsity pattern is fixed, so the off-process entries of every re-assembly are a
+        # subset of the first one. This lets PETSc reuse the communication pattern between solves
+        self._A.setOption(PETSc.Mat.Option.SUBSET_OFF_PROC_ENTRIES, True)
 
         self._b = _cpp.la.petsc.create_vector(self._mpc.function_space.dofmap.index_map,
                                               self._mpc.function_space.dofmap.index_map_bs)
@@ -100,34 +131,39 @@ class LinearProblem(_fem.petsc.LinearProblem):
         self._solver = PETSc.KSP().create(self.u.function_space.mesh.comm)
         self._solver.setOperators(self._A)
 
-        # Give PETSc solver options a unique prefix
-        solver_prefix = "dolfinx_mpc_solve_{}".format(id(self))
-        self._solver.setOptionsPrefix(solver_prefix)
+        self._solver.setOptionsPrefix(self._solver_prefix)
 
         # Set PETSc options
         opts = PETSc.Options()
-        opts.prefixPush(solver_prefix)
+        opts.prefixPush(self._solver_prefix)
         if petsc_options is not None:
             for k, v in petsc_options.items():
                 opts[k] = v
+                self._petsc_keys.append(k)
         opts.prefixPop()
         self._solver.setFromOptions()
 
+    def __del__(self):
+        # Remove the options of this problem from the global PETSc options database, as the
+        # unique prefix would otherwise make the database grow with every problem created.
+        # At interpreter shutdown the module globals may be torn down, or PETSc finalized, already
+        if PETSc is None or PETSc.Sys.isFinalized():
+            return
+        opts = PETSc.Options(self._solver_prefix)
+        for k in self._petsc_keys:
+            del opts[k]
+
     def solve(self) -> _fem.Function:
         """Solve the problem.
 
         Returns:
             Function containing the solution"""
 
-        # Assemble lhs
-        self._A.zeroEntries()
+        # Assemble lhs (`assemble_matrix` zeros and finalizes the matrix)
         assemble_matrix(self._a, self._mpc, bcs=self.bcs, A=self._A)
-        self._A.assemble()
         assert self._A.assembled
 
-        # Assemble rhs
-        with self._b.localForm() as b_loc:
-            b_loc.set(0)
+        # Assemble rhs (`assemble_vector` zeros the vector, including ghosts)
         assemble_vector(self._L, self._mpc, b=self._b)
 
         # Apply boundary conditions to the rhs
@@ -7,6 +7,9 @@
 __all__ = ["gather_PETScVector", "gather_PETScMatrix", "compare_mpc_lhs", "compare_mpc_rhs",
            "gather_transformation_matrix", "compare_CSR"]
 
+import typing
+import weakref
+
 import pytest
 import numpy as np
 from mpi4py import MPI
@@ -15,6 +18,14 @@ import scipy.sparse
 import dolfinx_mpc
 import dolfinx.common
 
+try:
+    import numba
+except ModuleNotFoundError:
+    numba = None  # type: ignore
+
+# Data gathered for a (finalized) multi point constraint, keyed on its C++ object
+_mpc_cache: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
 
 @pytest.fixture
 def get_assemblers(request):
@@ -36,23 +47,84 @@ def get_assemblers(request):
                            + "Options are 'numba' or 'C++'")
 
 
+def _get_cache(constraint) -> dict:
+    """
+    Get the cache of gathered data for a multi point constraint
+    """
+    return _mpc_cache.setdefault(constraint._cpp_object, {})
+
+
+class _ConstraintData(typing.NamedTuple):
+    """
+    Flat arrays describing the slaves owned by the process (local dof numbering), their
+    masters and coefficients, such that the masters of `slaves[i]` are
+    `masters[offsets[slaves[i]]:offsets[slaves[i]+1]]`
+    """
+    slaves: np.ndarray
+    masters: np.ndarray
+    coeffs: np.ndarray
+    offsets: np.ndarray
+    block_size: int
+
+
+def _unpack_constraint(constraint) -> _ConstraintData:
+    """
+    Extract the slave, master and coefficient arrays of a multi point constraint once.
+    The arrays are copied, as the views returned by the constraint would keep its C++ object,
+    i.e. the key of the cache, alive
+    """
+    cache = _get_cache(constraint)
+    if "data" not in cache:
+        masters = constraint.masters
+        cache["data"] = _ConstraintData(slaves=constraint.slaves[:constraint.num_local_slaves].copy(),
+                                        masters=masters.array.copy(), coeffs=constraint.coefficients()[0].copy(),
+                                        offsets=masters.offsets.copy(),
+                                        block_size=constraint.function_space.dofmap.index_map_bs)
+    return cache["data"]
+
+
 def _gather_slaves_global(constraint):
     """
-    Given a multi point constraint, return slaves for all processors with global dof numbering
+    Given a multi point constraint, return the local slaves and the sorted slaves for all processors,
+    both with global dof numbering
     """
-    imap = constraint.function_space.dofmap.index_map
-    num_local_slaves = constraint.num_local_slaves
-    block_size = constraint.function_space.dofmap.index_map_bs
-    _slaves = constraint.slaves
-    if num_local_slaves > 0:
-        slave_blocks = _slaves[:num_local_slaves] // block_size
-        slave_rems = _slaves[:num_local_slaves] % block_size
-        glob_slaves = imap.local_to_global(slave_blocks) * block_size + slave_rems
-    else:
-        glob_slaves = np.array([], dtype=np.int64)
+    cache = _get_cache(constraint)
+    if "slaves" not in cache:
+        imap = constraint.function_space.dofmap.index_map
+        data = _unpack_constraint(constraint)
+        block_size = data.block_size
+        if len(data.slaves) > 0:
+            slave_blocks = data.slaves // block_size
+            slave_rems = data.slaves % block_size
+            glob_slaves = np.asarray(imap.local_to_global(slave_blocks) * block_size + slave_rems, dtype=np.int64)
+        else:
+            glob_slaves = np.array([], dtype=np.int64)
 
-    slaves = np.hstack(MPI.COMM_WORLD.allgather(glob_slaves))
-    return slaves
+        # Gather the slaves of all processes directly into a preallocated buffer
+        comm = MPI.COMM_WORLD
+        counts = np.empty(comm.size, dtype=np.int64)
+        comm.Allgather(np.array([len(glob_slaves)], dtype=np.int64), counts)
+        displs = np.zeros(comm.size, dtype=np.int64)
+        np.cumsum(counts[:-1], out=displs[1:])
+        all_slaves = np.empty(counts.sum(), dtype=np.int64)
+        comm.Allgatherv(glob_slaves, [all_slaves, counts, displs])
+
+        cache["local_slaves"] = glob_slaves
+        cache["slaves"] = np.sort(all_slaves)
+    return cache["local_slaves"], cache["slaves"]
+
+
+def _dofs_except_slaves(constraint, glob_slaves):
+    """
+    Given a multi point constraint and the sorted slaves for all processors, return all degrees
+    of freedom (global dof numbering) that are not slaves
+    """
+    cache = _get_cache(constraint)
+    if "non_slaves" not in cache:
+        V = constraint.function_space
+        num_dofs = V.dofmap.index_map.size_global * V.dofmap.index_map_bs
+        cache["non_slaves"] = np.delete(np.arange(num_dofs, dtype=np.int64), glob_slaves)
+    return cache["non_slaves"]
 
 
 def gather_constants(constraint, root=0):
@@ -74,6 +146,82 @@ def gather_constants(constraint, root=0):
         return
 
 
+def _fill_slave_entries_numpy(slaves, glob_slaves, offsets, glob_masters, coeffs, all_slaves,
+                              K_val, rows, cols):
+    """
+    Fill the entries of the transformation matrix K corresponding to the local slaves, i.e.
+    one entry per master of each slave, or a diagonal entry if the slave has no masters.
+    The column of a dof in K is its global index minus the number of slaves with a lower index,
+    where `all_slaves` are the sorted global indices of all slaves.
+    """
+    # Flatten the masters of all slaves, i.e. concatenate
+    # masters[offsets[slave]:offsets[slave+1]] for each slave
+    num_masters = offsets[slaves + 1] - offsets[slaves]
+    local_offsets = np.zeros(len(slaves) + 1, dtype=np.int64)
+    np.cumsum(num_masters, out=local_offsets[1:])
+    flat_index = (np.arange(local_offsets[-1], dtype=np.int64)
+                  + np.repeat(offsets[slaves] - local_offsets[:-1], num_masters))
+    n0 = local_offsets[-1]
+    K_val[:n0] = coeffs[flat_index]
+    rows[:n0] = np.repeat(glob_slaves, num_masters)
+    cols[:n0] = glob_masters[flat_index] - np.searchsorted(all_slaves, glob_masters[flat_index], side="left")
+
+    # Slaves without masters (simple equality constraint, i.e. dirichletbc)
+    no_masters = glob_slaves[num_masters == 0]
+    n1 = n0 + len(no_masters)
+    K_val[n0:n1] = 1
+    rows[n0:n1] = no_masters
+    cols[n0:n1] = no_masters - np.searchsorted(all_slaves, no_masters, side="left")
+
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _fill_slave_entries_numba(slaves, glob_slaves, offsets, glob_masters, coeffs, all_slaves,
+                                  K_val, rows, cols):
+        """
+        Numba implementation of `_fill_slave_entries_numpy`
+        """
+        # Each slave writes to its own slice of the output, starting at `write_offsets[i]`
+        write_offsets = np.zeros(len(slaves) + 1, dtype=np.int64)
+        write_offsets[1:] = np.cumsum(np.maximum(offsets[slaves + 1] - offsets[slaves], 1))
+        for i in numba.prange(len(slaves)):
+            slave = slaves[i]
+            pos = write_offsets[i]
+            if offsets[slave + 1] == offsets[slave]:
+                K_val[pos] = 1
+                rows[pos] = glob_slaves[i]
+                cols[pos] = glob_slaves[i] - np.searchsorted(all_slaves, glob_slaves[i])
+            for j in range(offsets[slave], offsets[slave + 1]):
+                K_val[pos] = coeffs[j]
+                rows[pos] = glob_slaves[i]
+                cols[pos] = glob_masters[j] - np.searchsorted(all_slaves, glob_masters[j])
+                pos += 1
+
+
+def _fill_slave_entries(slaves, glob_slaves, offsets, glob_masters, coeffs, all_slaves,
+                        K_val, rows, cols):
+    """
+    Fill the entries of the transformation matrix K corresponding to the local slaves, see
+    `_fill_slave_entries_numpy`. If numba is installed, the parallel numba kernel is used, with
+    the cores of each node divided between the processes on it to avoid oversubscription
+    """
+    if numba is None:
+        _fill_slave_entries_numpy(slaves, glob_slaves, offsets, glob_masters, coeffs, all_slaves,
+                                  K_val, rows, cols)
+        return
+
+    node_comm = MPI.COMM_WORLD.Split_type(MPI.COMM_TYPE_SHARED)
+    num_threads = max(1, numba.config.NUMBA_NUM_THREADS // node_comm.size)
+    node_comm.Free()
+    current_num_threads = numba.get_num_threads()
+    numba.set_num_threads(min(num_threads, current_num_threads))
+    try:
+        _fill_slave_entries_numba(slaves, glob_slaves, offsets, glob_masters, coeffs, all_slaves,
+                                  K_val, rows, cols)
+    finally:
+        numba.set_num_threads(current_num_threads)
+
+
 def gather_transformation_matrix(constraint, root=0):
     """
     Creates the transformation matrix K (dim x dim-len(slaves)) for a given MPC
@@ -93,64 +241,78 @@ def gather_transformation_matrix(constraint, root=0):
     Output:
       K = [[1,0], [alpha beta], [0,1]]
     """
-    # Gather slaves from all procs
+    cache = _get_cache(constraint)
+    if ("K", root) in cache:
+        return cache[("K", root)]
+
     V = constraint.V
     imap = constraint.function_space.dofmap.index_map
-    block_size = V.dofmap.index_map_bs
-    num_local_slaves = constraint.num_local_slaves
-    # Gather all global_slaves
-    slaves = constraint.slaves[:num_local_slaves]
-    if num_local_slaves > 0:
-        local_blocks = slaves // block_size
-        local_rems = slaves % block_size
-        glob_slaves = imap.local_to_global(local_blocks) * block_size + local_rems
+    slaves, masters, coeffs, offsets, block_size = _unpack_constraint(constraint)
+
+    # Gather slaves from all procs
+    glob_slaves, all_slaves = _gather_slaves_global(constraint)
+
+    # Map all masters to global indices
+    if len(masters) > 0:
+        glob_masters = imap.local_to_global(masters // block_size) * block_size + masters % block_size
     else:
-        glob_slaves = np.array([], dtype=np.int64)
-    all_slaves = np.hstack(MPI.COMM_WORLD.allgather(glob_slaves))
-    masters = constraint.masters.array
-    master_blocks = masters // block_size
-    master_rems = masters % block_size
-    coeffs = constraint.coefficients()[0]
-    offsets = constraint.masters.offsets
-    # Create sparse K matrix
-    K_val, rows, cols = [], [], []
+        glob_masters = np.array([], dtype=np.int64)
+
+    # Rows of K that are not slaves
+    l_range = V.dofmap.index_map.local_range
+    global_dofs = np.arange(l_range[0] * block_size, l_range[1] * block_size, dtype=np.int64)
+    is_slave = np.isin(global_dofs, glob_slaves)
+    dofs_non_slave = global_dofs[~is_slave]
+
+    # Create sparse K matrix. Each slave has an entry per master, or a single entry if it has no masters
+    num_slave_entries = np.sum(np.maximum(offsets[slaves + 1] - offsets[slaves], 1))
+    num_entries = num_slave_entries + len(dofs_non_slave)
+    K_val = np.empty(num_entries, dtype=PETSc.ScalarType)
+    rows = np.empty(num_entries, dtype=np.int64)
+    cols = np.empty(num_entries, dtype=np.int64)
 
     # Add local contributions to K from local slaves
-    for slave, global_slave in zip(slaves, glob_slaves):
-        masters_index = (imap.local_to_global(master_blocks[offsets[slave]: offsets[slave + 1]])
-                         * block_size + master_rems[offsets[slave]: offsets[slave + 1]])
-        coeffs_index = coeffs[offsets[slave]: offsets[slave + 1]]
-        # If we have a simply equality constraint (dirichletbc)
-        if len(masters_index) > 0:
-            for master, coeff in zip(masters_index, coeffs_index):
-                count = sum(master > all_slaves)
-                K_val.append(coeff)
-                rows.append(global_slave)
-                cols.append(master - count)
-        else:
-            K_val.append(1)
-            count = sum(global_slave > all_slaves)
-            rows.append(global_slave)
-            cols.append(global_slave - count)
+    _fill_slave_entries(slaves, glob_slaves, offsets, glob_masters, coeffs, all_slaves,
+                        K_val, rows, cols)
 
     # Add identity for all dofs on diagonal
-    l_range = V.dofmap.index_map.local_range
-    global_dofs = np.arange(l_range[0] * block_size, l_range[1] * block_size)
-    is_slave = np.isin(global_dofs, glob_slaves)
-    for i, dof in enumerate(global_dofs):
-        if not is_slave[i]:
-            K_val.append(1)
-            rows.append(dof)
-            cols.append(dof - sum(dof > all_slaves))
+    K_val[num_slave_entries:] = 1
+    rows[num_slave_entries:] = dofs_non_slave
+    cols[num_slave_entries:] = dofs_non_slave - np.searchsorted(all_slaves, dofs_non_slave, side="left")
 
-    # Gather K to root
-    K_vals = MPI.COMM_WORLD.gather(np.asarray(K_val, dtype=PETSc.ScalarType), root=root)
-    rows_g = MPI.COMM_WORLD.gather(np.asarray(rows, dtype=np.int64), root=root)
-    cols_g = MPI.COMM_WORLD.gather(np.asarray(cols, dtype=np.int64), root=root)
+    # Gather K to root, directly into preallocated buffers
+    comm = MPI.COMM_WORLD
+    num_entries_all = np.empty(comm.size, dtype=np.int64) if comm.rank == root else None
+    comm.Gather(np.array([num_entries], dtype=np.int64), num_entries_all, root=root)
 
-    if MPI.COMM_WORLD.rank == root:
-        K_sparse = scipy.sparse.coo_matrix((np.hstack(K_vals), (np.hstack(rows_g), np.hstack(cols_g)))).tocsr()
-        return K_sparse
+    K_sparse = None
+    if comm.rank == root:
+        assert num_entries_all is not None
+        displs = np.zeros(comm.size, dtype=np.int64)
+        np.cumsum(num_entries_all[:-1], out=displs[1:])
+        K_vals = np.empty(num_entries_all.sum(), dtype=K_val.dtype)
+        rows_g = np.empty(num_entries_all.sum(), dtype=np.int64)
+        cols_g = np.empty(num_entries_all.sum(), dtype=np.int64)
+        comm.Gatherv(K_val, [K_vals, num_entries_all, displs], root=root)
+        comm.Gatherv(rows, [rows_g, num_entries_all, displs], root=root)
+        comm.Gatherv(cols, [cols_g, num_entries_all, displs], root=root)
+
+        # Build the CSR matrix directly from the row counts, avoiding the COO to CSR conversion
+        num_rows = imap.size_global * block_size
+        row_order = np.argsort(rows_g, kind="stable")
+        indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows_g, minlength=num_rows), out=indptr[1:])
+        # NOTE: Keep the number of columns inferred from the entries, as slaves without masters
+        # are placed on the diagonal
+        num_cols = cols_g.max() + 1 if len(cols_g) > 0 else 0
+        K_sparse = scipy.sparse.csr_matrix((K_vals[row_order], cols_g[row_order], indptr),
+                                           shape=(num_rows, num_cols))
+    else:
+        comm.Gatherv(K_val, None, root=root)
+        comm.Gatherv(rows, None, root=root)
+        comm.Gatherv(cols, None, root=root)
+    cache[("K", root)] = K_sparse
+    return K_sparse
 
 
 def petsc_to_local_CSR(A: PETSc.Mat, mpc: dolfinx_mpc.MultiPointConstraint):
@@ -162,8 +324,10 @@ def petsc_to_local_CSR(A: PETSc.Mat, mpc: dolfinx_mpc.MultiPointConstraint):
     is_A = PETSc.IS().createGeneral(global_indices[sort_index])
     A_loc = A.createSubMatrices(is_A)[0]
     ai, aj, av = A_loc.getValuesCSR()
-    A_csr = scipy.sparse.csr_matrix((av, aj, ai))
-    return A_csr[global_indices[:, None], global_indices]
+    # Row and column i of A_loc corresponds to the local index sort_index[i].
+    # Renumber the columns and reorder the rows to local numbering
+    A_csr = scipy.sparse.csr_matrix((av, sort_index[aj], ai), shape=(len(global_indices), len(global_indices)))
+    return A_csr[np.argsort(sort_index)]
 
 
 def gather_PETScMatrix(A: PETSc.Mat, root=0) -> scipy.sparse.csr_matrix:
@@ -171,29 +335,55 @@ def gather_PETScMatrix(A: PETSc.Mat, root=0) -> scipy.sparse.csr_matrix:
     Given a distributed PETSc matrix, gather in on process 'root' in
     a scipy CSR matrix
     """
+    comm = MPI.COMM_WORLD
     ai, aj, av = A.getValuesCSR()
-    aj_all = MPI.COMM_WORLD.gather(aj, root=root)  # type: ignore
-    av_all = MPI.COMM_WORLD.gather(av, root=root)  # type: ignore
-    ai_all = MPI.COMM_WORLD.gather(ai, root=root)  # type: ignore
-    if MPI.COMM_WORLD.rank == root:
-        ai_cum = [0]
-        for ai in ai_all:  # type: ignore
-            offsets = ai[1:] + ai_cum[-1]
-            ai_cum.extend(offsets)
-        return scipy.sparse.csr_matrix(
-            (np.hstack(av_all), np.hstack(aj_all), ai_cum), shape=A.getSize())  # type: ignore
+
+    # Gather the number of row offsets and non-zeros on each process
+    sizes = np.array([len(ai), len(aj)], dtype=np.int64)
+    all_sizes = np.empty((comm.size, 2), dtype=np.int64) if comm.rank == root else None
+    comm.Gather(sizes, all_sizes, root=root)
+
+    if comm.rank == root:
+        assert all_sizes is not None
+        ai_counts, nnz = all_sizes[:, 0], all_sizes[:, 1]
+        ai_all = np.empty(ai_counts.sum(), dtype=ai.dtype)
+        aj_all = np.empty(nnz.sum(), dtype=aj.dtype)
+        av_all = np.empty(nnz.sum(), dtype=av.dtype)
+        ai_displs = np.zeros(comm.size, dtype=np.int64)
+        np.cumsum(ai_counts[:-1], out=ai_displs[1:])
+        nnz_displs = np.zeros(comm.size, dtype=np.int64)
+        np.cumsum(nnz[:-1], out=nnz_displs[1:])
+        comm.Gatherv(ai, [ai_all, ai_counts, ai_displs], root=root)
+        comm.Gatherv(aj, [aj_all, nnz, nnz_displs], root=root)
+        comm.Gatherv(av, [av_all, nnz, nnz_displs], root=root)
+
+        # Shift the row offsets of each process by the number of non-zeros on the previous processes,
+        # and drop the leading zero offset of each process
+        is_first = np.zeros(len(ai_all), dtype=bool)
+        is_first[ai_displs] = True
+        ai_cum = np.hstack([np.zeros(1, dtype=np.int64), (ai_all + np.repeat(nnz_displs, ai_counts))[~is_first]])
+        return scipy.sparse.csr_matrix((av_all, aj_all, ai_cum), shape=A.getSize())
+    else:
+        comm.Gatherv(ai, None, root=root)
+        comm.Gatherv(aj, None, root=root)
+        comm.Gatherv(av, None, root=root)
 
 
 def gather_PETScVector(vector: PETSc.Vec, root=0) -> np.ndarray:
     """
     Gather a PETScVector from different processors on
-    process 'root' as an numpy array
+    process 'root' as an numpy array. On all other processes an empty array is returned.
     """
-    numpy_vec = np.zeros(vector.size, dtype=vector.array.dtype)
-    l_min = vector.owner_range[0]
-    l_max = vector.owner_range[1]
-    numpy_vec[l_min: l_max] += vector.array
-    return np.asarray(sum(MPI.COMM_WORLD.allgather(numpy_vec)))
+    comm = MPI.COMM_WORLD
+    ranges = vector.getOwnershipRanges()
+    if comm.rank == root:
+        global_vec = np.empty(vector.size, dtype=vector.array.dtype)
+        recvbuf = [global_vec, np.diff(ranges), ranges[:-1]]
+    else:
+        global_vec = np.empty(0, dtype=vector.array.dtype)
+        recvbuf = None
+    comm.Gatherv(vector.array_r, recvbuf, root=root)
+    return global_vec
 
 
 def compare_CSR(A: scipy.sparse.csr_matrix, B: scipy.sparse.csr_matrix, atol=1e-10):
@@ -212,22 +402,21 @@ def compare_mpc_lhs(A_org: PETSc.Mat, A_mpc: PETSc.Mat,
     """
     timer = dolfinx.common.Timer("~MPC: Compare matrices")
     comm = mpc.V.mesh.comm
-    V = mpc.V
     assert root < comm.size
 
     K = gather_transformation_matrix(mpc, root=root)
     A_csr = gather_PETScMatrix(A_org, root=root)
 
     # Get global slaves
-    glob_slaves = _gather_slaves_global(mpc)
+    _, glob_slaves = _gather_slaves_global(mpc)
     A_mpc_csr = gather_PETScMatrix(A_mpc, root=root)
     if MPI.COMM_WORLD.rank == root:
-        KTAK = np.conj(K.T) * A_csr * K
+        # K has fewer columns than rows, so A K is a smaller intermediate than K^H A
+        KH = K.T.conj().tocsr()
+        KTAK = KH @ (A_csr @ K)
 
         # Remove identity rows of MPC matrix
-        all_cols = np.arange(V.dofmap.index_map.size_global * V.dofmap.index_map_bs)
-
-        cols_except_slaves = np.flatnonzero(np.isin(all_cols, glob_slaves, invert=True).astype(np.int32))
+        cols_except_slaves = _dofs_except_slaves(mpc, glob_slaves)
         mpc_without_slaves = A_mpc_csr[cols_except_slaves[:, None], cols_except_slaves]
 
         # Compute difference
@@ -240,7 +429,7 @@ def compare_mpc_rhs(b_org: PETSc.Vec, b: PETSc.Vec, constraint: dolfinx_mpc.Mult
     """
     Compare an unconstrained RHS with an MPC rhs.
     """
-    glob_slaves = _gather_slaves_global(constraint)
+    _, glob_slaves = _gather_slaves_global(constraint)
     b_org_np = gather_PETScVector(b_org, root=root)
     b_np = gather_PETScVector(b, root=root)
     K = gather_transformation_matrix(constraint, root=root)
@@ -248,7 +437,6 @@ def compare_mpc_rhs(b_org: PETSc.Vec, b: PETSc.Vec, constraint: dolfinx_mpc.Mult
     comm = constraint.V.mesh.comm
     if comm.rank == root:
         reduced_b = np.conj(K.T) @ b_org_np  # - constants for RHS mpc
-        all_cols = np.arange(constraint.V.dofmap.index_map.size_global * constraint.V.dofmap.index_map_bs)
-        cols_except_slaves = np.flatnonzero(np.isin(all_cols, glob_slaves, invert=True).astype(np.int32))
+        cols_except_slaves = _dofs_except_slaves(constraint, glob_slaves)
         assert np.allclose(b_np[glob_slaves], 0)
         assert np.allclose(b_np[cols_except_slaves], reduced_b)
@@ -4,6 +4,8 @@
 #
 # SPDX-License-Identifier:    MIT
 
+import gc
+import weakref
 
 import dolfinx_mpc
 import dolfinx_mpc.utils
@@ -89,3 +91,87 @@ def test_pipeline(u_from_mpc):
             problem = dolfinx_mpc.LinearProblem(bilinear_form, linear_form, mpc, bcs=[], u=uh,
                                                 petsc_options={"ksp_type": "preonly", "pc_type": "lu"})
             problem.solve()
+
+
+def test_repeated_solve():
+    mesh = create_unit_square(MPI.COMM_WORLD, 5, 5)
+    V = fem.FunctionSpace(mesh, ("Lagrange", 1))
+    u = ufl.TrialFunction(V)
+    v = ufl.TestFunction(V)
+    d = fem.Constant(mesh, PETSc.ScalarType(0.01))
+    x = ufl.SpatialCoordinate(mesh)
+    f = ufl.sin(2 * ufl.pi * x[0]) * ufl.sin(ufl.pi * x[1])
+    a = ufl.inner(ufl.grad(u), ufl.grad(v)) * ufl.dx + d * ufl.inner(u, v) * ufl.dx
+    rhs = d * ufl.inner(f, v) * ufl.dx
+
+    def periodic_relation(x):
+        out_x = np.copy(x)
+        out_x[0] = 1 - x[0]
+        return out_x
+
+    facets = locate_entities_boundary(mesh, mesh.topology.dim - 1, lambda x: np.isclose(x[0], 1))
+    arg_sort = np.argsort(facets)
+    mt = meshtags(mesh, mesh.topology.dim - 1, facets[arg_sort], np.full(len(facets), 2, dtype=np.int32))
+    mpc = dolfinx_mpc.MultiPointConstraint(V)
+    mpc.create_periodic_constraint_topological(V, mt, 2, periodic_relation, [], 1)
+    mpc.finalize()
+
+    # Re-assembling the system of the same problem should give the same solution as a new problem
+    petsc_options = {"ksp_type": "preonly", "pc_type": "lu"}
+    problem = dolfinx_mpc.LinearProblem(a, rhs, mpc, petsc_options=petsc_options)
+    num_owned = mpc.function_space.dofmap.index_map.size_local * mpc.function_space.dofmap.index_map_bs
+    for value in [0.01, 0.5, 2]:
+        d.value = value
+        uh = problem.solve()
+        u_ref = dolfinx_mpc.LinearProblem(a, rhs, mpc, petsc_options=petsc_options).solve()
+        assert np.allclose(uh.x.array[:num_owned], u_ref.x.array[:num_owned])
+
+
+def test_form_reuse():
+    mesh = create_unit_square(MPI.COMM_WORLD, 3, 3)
+    V = fem.FunctionSpace(mesh, ("Lagrange", 1))
+    u = ufl.TrialFunction(V)
+    v = ufl.TestFunction(V)
+    f = fem.Constant(mesh, PETSc.ScalarType(1))
+    a = ufl.inner(u, v) * ufl.dx
+    rhs = ufl.inner(f, v) * ufl.dx
+
+    mpc = dolfinx_mpc.MultiPointConstraint(V)
+    mpc.finalize()
+
+    # Identical forms and options should reuse the compiled forms
+    problem_0 = dolfinx_mpc.LinearProblem(a, rhs, mpc)
+    problem_1 = dolfinx_mpc.LinearProblem(a, rhs, mpc)
+    assert problem_0._a is problem_1._a
+    assert problem_0._L is problem_1._L
+
+    # Different options should give new compiled forms
+    problem_2 = dolfinx_mpc.LinearProblem(a, rhs, mpc, jit_options={"cffi_extra_compile_args": ["-O1"]})
+    assert problem_2._a is not problem_0._a
+    assert problem_2._L is not problem_0._L
+
+    # The compiled forms should be released together with the UFL forms
+    compiled_a = weakref.ref(problem_0._a)
+    del problem_0, problem_1, problem_2, a
+    gc.collect()
+    assert compiled_a() is None
+
+
+def test_options_removed():
+    mesh = create_unit_square(MPI.COMM_WORLD, 3, 3)
+    V = fem.FunctionSpace(mesh, ("Lagrange", 1))
+    u = ufl.TrialFunction(V)
+    v = ufl.TestFunction(V)
+    a = ufl.inner(u, v) * ufl.dx
+    rhs = v * ufl.dx
+    mpc = dolfinx_mpc.MultiPointConstraint(V)
+    mpc.finalize()
+
+    problem = dolfinx_mpc.LinearProblem(a, rhs, mpc, petsc_options={"ksp_type": "preonly", "pc_type": "lu"})
+    prefix = problem._solver_prefix
+    assert any(key.startswith(prefix) for key in PETSc.Options().getAll())
+
+    # The options of the problem should be removed from the PETSc options database with the problem
+    del problem
+    gc.collect()
+    assert not any(key.startswith(prefix) for key in PETSc.Options().getAll())
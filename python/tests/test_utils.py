@@ -0,0 +1,85 @@
+# Copyright (C) 2022 Jørgen S. Dokken
+#
+# This file is part of DOLFINX_MPC
+#
+# SPDX-License-Identifier:    MIT
+
+import gc
+import weakref
+
+import dolfinx.fem as fem
+import dolfinx_mpc
+import dolfinx_mpc.utils
+import numpy as np
+import pytest
+from dolfinx.mesh import create_unit_square
+from dolfinx_mpc.utils import test as test_utils
+from mpi4py import MPI
+
+
+def test_cache_released():
+    mesh = create_unit_square(MPI.COMM_WORLD, 3, 3)
+    V = fem.FunctionSpace(mesh, ("Lagrange", 1))
+
+    def l2b(li):
+        return np.array(li, dtype=np.float64).tobytes()
+    s_m_c = {l2b([1, 0]): {l2b([0, 1]): 0.43, l2b([1, 1]): 0.11}}
+    num_cached = len(test_utils._mpc_cache)
+    mpc = dolfinx_mpc.MultiPointConstraint(V)
+    mpc.create_general_constraint(s_m_c)
+    mpc.finalize()
+
+    # Populate the cache of the constraint
+    dolfinx_mpc.utils.gather_transformation_matrix(mpc)
+    assert len(test_utils._mpc_cache) == num_cached + 1
+
+    # The cached data should not keep the constraint alive
+    cpp_mpc = weakref.ref(mpc._cpp_object)
+    del mpc
+    gc.collect()
+    assert cpp_mpc() is None
+    assert len(test_utils._mpc_cache) == num_cached
+
+
+def _synthetic_slave_data(seed, num_dofs=50, num_slaves=15):
+    """
+    Create the (serial) input of the kernels filling the slave entries of the transformation
+    matrix, including slaves without masters
+    """
+    rng = np.random.default_rng(seed)
+    slaves = np.sort(rng.choice(num_dofs, num_slaves, replace=False)).astype(np.int32)
+    num_masters = np.zeros(num_dofs, dtype=np.int32)
+    num_masters[slaves] = rng.integers(0, 4, num_slaves)
+    num_masters[slaves[::4]] = 0
+    offsets = np.zeros(num_dofs + 1, dtype=np.int32)
+    np.cumsum(num_masters, out=offsets[1:])
+    non_slaves = np.setdiff1d(np.arange(num_dofs, dtype=np.int64), slaves)
+    masters = rng.choice(non_slaves, offsets[-1])
+    coeffs = rng.random(offsets[-1])
+    glob_slaves = slaves.astype(np.int64)
+    return slaves, glob_slaves, offsets, masters, coeffs, glob_slaves
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_fill_slave_entries(seed):
+    pytest.importorskip("numba")
+    data = _synthetic_slave_data(seed)
+    slaves, offsets = data[0], data[2]
+    num_entries = np.sum(np.maximum(offsets[slaves + 1] - offsets[slaves], 1))
+
+    entries = []
+    for kernel in [test_utils._fill_slave_entries_numpy, test_utils._fill_slave_entries_numba,
+                   test_utils._fill_slave_entries]:
+        K_val = np.empty(num_entries, dtype=np.float64)
+        rows = np.empty(num_entries, dtype=np.int64)
+        cols = np.empty(num_entries, dtype=np.int64)
+        kernel(*data, K_val, rows, cols)
+        # The kernels may order the entries differently
+        order = np.lexsort((K_val, cols, rows))
+        entries.append((K_val[order], rows[order], cols[order]))
+
+    val_np, rows_np, cols_np = entries[0]
+    for (val, rows, cols) in entries[1:]:
+        assert np.array_equal(rows_np, rows)
+        assert np.array_equal(cols_np, cols)
+        assert np.allclose(val_np, val)